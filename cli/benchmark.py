@@ -1,60 +1,36 @@
-import pstats
+import tracemalloc
+from time import perf_counter
 from typing import Optional
-from cProfile import Profile
-from functools import partial
 from dataclasses import dataclass
 from compressors import Compressor
-from memory_profiler import memory_usage
+
+# The amount of bytes in a mebibyte (memory usage is reported in MiB):
+BYTES_PER_MIB = 1024 * 1024
 
 
 @dataclass(init=False)
 class BenchmarkResults:
-    # Stats about the runtime of the encode/decode method used in the benchmark:
-    runtime_results: pstats.FunctionProfile
+    # The runtime of the encode/decode method used in the benchmark, in seconds:
+    runtime: float
 
-    # Memory usage over time:
-    memory_interval: float
-    memory_usage_over_time: list[float]
-    max_mem: float
-    min_mem: float
-    avg_mem: float
+    # The largest amount of memory that the method had allocated at once, in MiB:
+    peak_memory: float
 
     # Results regarding compression efficiency:
     compression_ratio: Optional[float]
     space_saving: Optional[float]
 
-    def __init__(
-            self, runtime_data: pstats.FunctionProfile, memory_data: list[float], memory_interval: float,
-            data_size: Optional[tuple[int, int]]
-    ) -> 'BenchmarkResults':
+    def __init__(self, runtime: float, peak_memory: float, data_size: Optional[tuple[int, int]]) -> 'BenchmarkResults':
         """
         Initializes the BenchmarkResults object.
-        :param runtime_data: Data regarding the performance of the algorithm, represented as a pstats.FunctionProfile
-                             object.
-        :param memory_data: A sequence of memory usage values. This sequence represent the memory usage of the function,
-                            measured at different intervals (time difference between each measurement is the
-                            'memory_interval' parameter).
-        :param memory_interval: The time interval between each memory measurement.
+        :param runtime: The time it took the algorithm to run, in seconds.
+        :param peak_memory: The peak amount of memory allocated by the algorithm while it ran, in bytes.
         :param data_size: A tuple containing the original size of the data and the compressed size of the data, in this
                           order. This parameter only makes sense when compressing, hence why it is optional.
         """
         # Set attributes:
-        self.memory_interval = memory_interval
-        self.runtime_results = runtime_data
-        self.memory_usage_over_time = memory_data
-
-        # Calculate minimum, maximum and average memory usage (not using builtin method since it's less efficient):
-        self.min_mem, self.max_mem, self.avg_mem = float('inf'), float('-inf'), 0
-        for m in self.memory_usage_over_time:
-            self.min_mem = min(m, self.min_mem)
-            self.max_mem = max(m, self.max_mem)
-            self.avg_mem += m
-
-        # Handle cases without memory data:
-        if len(memory_data) == 0:
-            self.min_mem, self.max_mem, self.avg_mem = 0, 0, 0
-        else:
-            self.avg_mem /= len(self.memory_usage_over_time)
+        self.runtime = runtime
+        self.peak_memory = peak_memory / BYTES_PER_MIB
 
         # Calculate compression ratio and space saving
         self.compression_ratio = None
@@ -83,23 +59,31 @@ class CompressorBenchmark:
         """
         Compresses or decompresses the data given to the method, while tracking various stats such as speed and memory
         usage.
+        The algorithm runs twice - once while it's timed, and once while its memory allocations are traced.
         :param input_data: The data that will be given to the compression/decompression algorithm. When receiving
                            the benchmark information, it is important to remember it is about activating the algorithm
                            on this particular data (and does not represent general stats for the algorithm).
         :param compress: Whether the benchmark should compress or decompress the input data.
+        :return: The output of the algorithm, and the results of the benchmark.
         """
-        # Profile runtime and memory:
-        MEMORY_INTERVAL = 1e-3
-        method_to_check = partial(self.compressor.encode if compress else self.compressor.decode, input_data)
-        with Profile() as runtime_profiler:
-            (memory_usage_data, output) = memory_usage(proc=method_to_check, interval=MEMORY_INTERVAL, retval=True)
+        method_to_check = self.compressor.encode if compress else self.compressor.decode
 
-        # Create the results (add data about compression if we encode):
-        method_name = 'encode' if compress else 'decode'
-        runtime_data = pstats.Stats(runtime_profiler).get_stats_profile().func_profiles[method_name]
+        # Time the method on its own (a profiler running alongside it would be counted in its runtime):
+        start_time = perf_counter()
+        output = method_to_check(input_data)
+        runtime = perf_counter() - start_time
 
+        # Trace the method's memory in a separate run, since tracing every allocation slows the method down a lot:
+        tracemalloc.start()
+        try:
+            method_to_check(input_data)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Create the results (add data about compression if we encode):
         data_size = (len(input_data), len(output)) if compress else None
-        results = BenchmarkResults(runtime_data, memory_usage_data, MEMORY_INTERVAL, data_size)
+        results = BenchmarkResults(runtime, peak_memory, data_size)
 
         return output, results
 
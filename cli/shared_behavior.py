@@ -43,22 +43,13 @@ def get_benchmark_table(benchmark_results: BenchmarkResults) -> Table:
     # Create columns for the main table:
     main_table = Table(title='Benchmark Results', style="bold blue", title_style="bold white")
     main_table.add_column('Total Time (s)')
-    main_table.add_column('Memory Usage (MiB)')
+    main_table.add_column('Peak Memory (MiB)')
     if is_compressing:
         main_table.add_column('Compression Ratio')
         main_table.add_column('Space Saving')
 
-    # Add memory sub-table:
-    memory_table = Table(show_edge=False, show_lines=False)
-    memory_table.add_column('Min')
-    memory_table.add_column('Avg')
-    memory_table.add_column('Max')
-
     # Add the actual data:
-    memory_data = f"{benchmark_results.min_mem:.2f}", f"{benchmark_results.avg_mem:.2f}", f"{benchmark_results.max_mem:.2f}"
-    memory_table.add_row(*memory_data)
-
-    row = [f"{benchmark_results.runtime_results.cumtime:.4f}", memory_table]
+    row = [f"{benchmark_results.runtime:.4f}", f"{benchmark_results.peak_memory:.2f}"]
     if is_compressing:
         # Show space-saving as percentage:
         row += [f"{benchmark_results.compression_ratio:.2f}", f"{(100 * benchmark_results.space_saving):.2f} %"]
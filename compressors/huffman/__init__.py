@@ -1,4 +1,3 @@
-import util
 from .tree import HuffmanTree
 from collections import Counter
 from compressors import Compressor
@@ -18,30 +17,83 @@ class HuffmanCompressor(Compressor):
         if not isinstance(input_data, bytes):
             raise TypeError(f'Expected type bytes, got {type(input_data)} instead')
 
-        # Count the frequency of every byte value in the input data, and turn it into a list of size 256:
-        frequencies: Counter = Counter(input_data)
-        frequencies: list[int] = [frequencies[i] for i in range(256)]
+        # Count the frequency of every byte value in the input data, and turn it into a list of size 256 (using `get`
+        # since Counter's `__getitem__` falls back to a Python-level `__missing__` for every absent byte value):
+        counter: Counter = Counter(input_data)
+        frequencies: list[int] = [counter.get(i, 0) for i in range(256)]
 
-        # Create the huffman tree and produce identifiers from it:
-        huffman_tree = HuffmanTree(frequencies)
-        encoded_bytes: dict[bytes, identifiers.HuffmanEncoding] = huffman_tree.get_encodings()
+        # Create the huffman tree and produce identifiers from it, along with tables of the encodings indexed by the
+        # byte value (so replacing a byte with its encoding doesn't require any hashing):
+        tree, codes, lengths = HuffmanCompressor.__get_limited_tree(frequencies)
+        encoded_bytes: dict[bytes, identifiers.HuffmanEncoding] = tree.get_encodings()
 
-        # Create a buffer that will store the compressed bits:
-        bit_buffer: BitBuffer = identifiers.turn_identifiers_into_bits(encoded_bytes)
+        # Create a buffer that will store the compressed bits (the encodings came straight from the tree, so there's no
+        # need to validate them):
+        bit_buffer: BitBuffer = identifiers.turn_identifiers_into_bits(encoded_bytes, validate=False)
+
+        # Every encoding takes at least 1 bit (a tree with a single leaf gives it an empty encoding). The lengths of byte
+        # values that aren't in the input are never used, so they can be raised as well:
+        lengths = [max(1, length) for length in lengths]
 
         # Replace byte values with their huffman encoding:
+        return HuffmanCompressor.__emit_encodings(input_data, bit_buffer, tuple(codes), tuple(lengths))
+
+    @staticmethod
+    def __emit_encodings(
+            input_data: bytes, header: BitBuffer, codes: tuple[int, ...], lengths: tuple[int, ...]
+    ) -> bytes:
+        """
+        Writes the huffman encoding of every byte in the input data right after the header's bits.
+        :param input_data: The input data before being compressed.
+        :param header: A BitBuffer holding the identifiers of the huffman encodings.
+        :param codes: A table of length 256, where the element at index 'i' is the huffman encoding of the byte 'i'.
+        :param lengths: A table of length 256, where the element at index 'i' is the length in bits of the huffman
+                        encoding of the byte 'i'.
+        :return: The header's bits followed by the encoded input data, padded as described below.
+        """
+        # The encodings are accumulated in an integer and written out in whole 64 bits words. The header may not end
+        # on a byte boundary, so its last partial byte is moved back into the accumulator:
+        output = bytearray(bytes(header))
+        acc_bits: int = len(header) % 8
+        acc: int = output.pop() >> (8 - acc_bits) if acc_bits > 0 else 0
+
         for byte_val in input_data:
-            encoding: identifiers.HuffmanEncoding = encoded_bytes[bytes([byte_val])]
-            encoding.load_to_buffer(bit_buffer)
+            length = lengths[byte_val]
+            acc = (acc << length) | codes[byte_val]
+            acc_bits += length
+            if acc_bits >= 64:
+                acc_bits -= 64
+                output += (acc >> acc_bits).to_bytes(8, 'big')
+                acc &= (1 << acc_bits) - 1
 
         # Since the compressed data's bit count may not be divisible by 8, zeroes will be added to its end. This could
         # add data accidentally, so as a precaution, we'll make the last byte equal the number of zeroes that were added
         # to the compressed data:
         if len(input_data) > 0:
-            added_zeroes = (8 - len(bit_buffer) % 8) % 8
-            bit_buffer.insert_bits(added_zeroes, 8 + added_zeroes)
+            added_zeroes = (8 - acc_bits % 8) % 8
+            output += (acc << added_zeroes).to_bytes((acc_bits + added_zeroes) // 8, 'big')
+            output.append(added_zeroes)
 
-        return bytes(bit_buffer)
+        return bytes(output)
+
+    @staticmethod
+    def __get_limited_tree(frequencies: list[int]) -> tuple[HuffmanTree, list[int], list[int]]:
+        """
+        Builds a huffman tree from the given frequencies, while making sure none of its encodings is longer than
+        identifiers.MAX_ENCODING_LENGTH bits.
+        Very skewed frequencies produce deep trees, so if an encoding is too long the frequencies are flattened (halved,
+        keeping every non-zero frequency positive) and the tree is rebuilt, until all encodings are short enough.
+        :param frequencies: A list of length 256, where the element at index 'i' is the frequency of the byte 'i'.
+        :return: The huffman tree, and its encodings and their lengths as tables indexed by the byte value (as returned
+                 by `HuffmanTree.get_encoding_tables`).
+        """
+        while True:
+            tree: HuffmanTree = HuffmanTree(frequencies)
+            codes, lengths = tree.get_encoding_tables()
+            if max(lengths) <= identifiers.MAX_ENCODING_LENGTH:
+                return tree, codes, lengths
+
+            frequencies = [1 + freq // 2 if freq > 0 else 0 for freq in frequencies]
 
     def decode(self, compressed_data: bytes) -> bytes:
         """
@@ -50,6 +102,9 @@ class HuffmanCompressor(Compressor):
         used on data that was compressed using the `encode` method in the HuffmanCompressor class.
         :param compressed_data: Data that was compressed using the HuffmanCompressor class.
         :return: The decompressed bytes of the given data.
+        :raises TypeError: If the compressed data isn't a `bytes` object.
+        :raises ValueError: If the compressed bits don't match the encodings in the data.
+        :raises InvalidIdentifiersFormat: If the encodings at the start of the data are malformed.
         """
         # Type check:
         if not isinstance(compressed_data, bytes):
@@ -59,30 +114,45 @@ class HuffmanCompressor(Compressor):
         if len(compressed_data) == 0:
             return bytes()
 
-        # Get encodings from the start of the data:
+        # Get encodings from the start of the data, and a table for decoding them:
         encodings, data_start_idx = identifiers.get_identifiers_from_bytes(compressed_data)
+        byte_vals, lengths, window_bits = identifiers.get_decoding_table(encodings)
 
-        # Get the amount of padding added to the end of the compressed data:
+        # Get the amount of bits to decode. We skip the last byte that contains the padding length (the -1 in the
+        # parenthesis), and skip the padding itself (-padding_length):
         padding_length = compressed_data[-1]
-
-        # Initialize a bit buffer and a variable holding the current encoded part:
-        buffer: BitBuffer = BitBuffer()
-        encoded_key: identifiers.HuffmanEncoding = identifiers.HuffmanEncoding(0, 0)
-        offset: int = data_start_idx
-
-        # Go over the bits. We skip the last byte that contains the padding length (the -1 in the parenthesis), and skip
-        # the padding itself (-padding_length):
-        while offset < 8 * (len(compressed_data) - 1) - padding_length:
-            # Add the original byte values based on the currently held encoded_key:
-            current_bit = util.get_bit(compressed_data, offset)
-            encoded_key.bit_length += 1
-            encoded_key.encoding = (encoded_key.encoding << 1) | current_bit
-
-            if encoded_key in encodings:
-                original_byte: bytes = encodings[encoded_key]
-                buffer.insert_bits(original_byte[0], 8)
-                encoded_key.bit_length = 0
-                encoded_key.encoding = 0
-            offset += 1
-
-        return bytes(buffer)
+        remaining_bits = 8 * (len(compressed_data) - 1) - padding_length - data_start_idx
+        if remaining_bits < 0:
+            raise ValueError('Malformed compressed data: Not enough bits for the padding')
+
+        # Initialize the output (it is byte-aligned, so there's no need for a bit buffer):
+        output = bytearray()
+
+        # The data's bits are read into an accumulator, starting with the bits left in the header's last byte:
+        byte_idx, acc_bits = data_start_idx // 8, 8 - data_start_idx % 8
+        acc = compressed_data[byte_idx] & ((1 << acc_bits) - 1) if remaining_bits > 0 else 0
+        byte_idx += 1
+
+        while remaining_bits > 0:
+            # Make sure the accumulator holds a full window of bits (unless the data ended):
+            while acc_bits < window_bits and byte_idx < len(compressed_data) - 1:
+                acc = (acc << 8) | compressed_data[byte_idx]
+                acc_bits += 8
+                byte_idx += 1
+
+            # Look up the byte value whose encoding starts the accumulator's bits:
+            if acc_bits >= window_bits:
+                window = acc >> (acc_bits - window_bits)
+            else:
+                window = acc << (window_bits - acc_bits)
+            length = lengths[window]
+            if length == 0 or length > remaining_bits:
+                raise ValueError('Malformed compressed data: Bits that do not match any encoding')
+
+            # Add the original byte value and remove its encoding from the accumulator:
+            output.append(byte_vals[window])
+            acc_bits -= length
+            remaining_bits -= length
+            acc &= (1 << acc_bits) - 1
+
+        return bytes(output)
@@ -2,6 +2,9 @@ import util
 from dataclasses import dataclass
 from util.bitbuffer import BitBuffer
 
+# The length of every huffman encoding is stored in 4 bits, so no encoding can be longer than this:
+MAX_ENCODING_LENGTH = 15
+
 
 class InvalidIdentifiersFormat(Exception):
     """
@@ -29,7 +32,9 @@ class HuffmanEncoding:
         return str(bin(self.encoding)[2:]).zfill(self.bit_length)
 
     def __hash__(self):
-        return (self.encoding << 10) | self.bit_length
+        # Hash the fields together (packing them into one integer collides once bit_length needs more bits than the
+        # shift leaves it, and spreads poorly across the dict's table):
+        return hash((self.bit_length, self.encoding))
 
 
 def get_identifiers_from_bytes(bit_stream: bytes) -> tuple[dict[HuffmanEncoding, bytes], int]:
@@ -54,31 +59,70 @@ def get_identifiers_from_bytes(bit_stream: bytes) -> tuple[dict[HuffmanEncoding,
     # First byte is the number of identifiers encoded (minus one):
     identifiers_count = bit_stream[0] + 1
 
+    # Every identifier takes up at most 12 + MAX_ENCODING_LENGTH bits, so only the start of the stream can contain them.
+    # This part is loaded into a single integer, and the identifiers' fields are read from it using shifts and masks:
+    header_bytes = bit_stream[:1 + (256 * (12 + MAX_ENCODING_LENGTH) + 7) // 8]
+    header_bits = 8 * len(header_bytes)
+    header = int.from_bytes(header_bytes, 'big')
+
     # Extract the identifiers (initialize a bit index):
     bit_idx: int = 8
     for i in range(identifiers_count):
-        try:
-            # Get the value that's encoded:
-            original_value = util.read_bits(bit_stream, bit_idx, 8)
-            bit_idx += 8
-
-            # Get the length of the huffman encoding in bits (next byte bits):
-            encoding_len = util.read_bits(bit_stream, bit_idx, 8)
-            bit_idx += 8
-
-            # Get the actual encoding:
-            encoding = util.read_bits(bit_stream, bit_idx, encoding_len)
-            bit_idx += encoding_len
-
-            # Insert to dictionary:
-            identifiers[HuffmanEncoding(encoding_len, encoding)] = bytes([original_value])
-        except IndexError:
+        # Get the value that's encoded (first 8 bits) and the length of its huffman encoding in bits (next 4 bits):
+        if bit_idx + 12 > header_bits:
+            raise InvalidIdentifiersFormat()
+        fields = (header >> (header_bits - bit_idx - 12)) & 0xFFF
+        original_value, encoding_len = fields >> 4, fields & 0xF
+        bit_idx += 12
+
+        # Get the actual encoding:
+        if encoding_len == 0 or bit_idx + encoding_len > header_bits:
             raise InvalidIdentifiersFormat()
+        encoding = (header >> (header_bits - bit_idx - encoding_len)) & ((1 << encoding_len) - 1)
+        bit_idx += encoding_len
+
+        # Insert to dictionary:
+        identifiers[HuffmanEncoding(encoding_len, encoding)] = util.SINGLE_BYTES[original_value]
 
     return identifiers, bit_idx
 
 
-def turn_identifiers_into_bits(identifiers: dict[bytes, HuffmanEncoding]) -> BitBuffer:
+def get_decoding_table(identifiers: dict[HuffmanEncoding, bytes]) -> tuple[list[int], list[int], int]:
+    """
+    Builds a lookup table for decoding data that was encoded using the given huffman encodings.
+    The table is indexed by the next `window_bits` bits of the encoded data, where `window_bits` is the length of the
+    longest encoding. Every encoding fills all the entries whose index starts with its bits, so a single lookup tells
+    both the byte value at the start of those bits and the length of its encoding (instead of matching the data one bit
+    at a time). Since encodings are at most MAX_ENCODING_LENGTH bits long, the table has at most 32768 entries.
+    :param identifiers: A dictionary mapping huffman encodings to the byte values they encode, as returned by
+                        `get_identifiers_from_bytes`.
+    :return: The byte values table, the encoding lengths table (an entry of length 0 doesn't match any encoding) and
+             `window_bits`, in this order.
+    :raises InvalidIdentifiersFormat: If the encodings aren't prefix-free (one of them is the start of another), so
+                                      they can't be decoded unambiguously.
+    """
+    # Empty identifiers case:
+    if len(identifiers) == 0:
+        return [], [], 0
+
+    # Initialize the tables:
+    window_bits = max(encoding.bit_length for encoding in identifiers)
+    byte_vals, lengths = [0] * (1 << window_bits), [0] * (1 << window_bits)
+
+    for encoding, byte_val in identifiers.items():
+        # Every index starting with the encoding's bits belongs to it:
+        free_bits = window_bits - encoding.bit_length
+        start, end = encoding.encoding << free_bits, (encoding.encoding + 1) << free_bits
+        if any(lengths[start:end]):
+            raise InvalidIdentifiersFormat()
+
+        byte_vals[start:end] = [byte_val[0]] * (end - start)
+        lengths[start:end] = [encoding.bit_length] * (end - start)
+
+    return byte_vals, lengths, window_bits
+
+
+def turn_identifiers_into_bits(identifiers: dict[bytes, HuffmanEncoding], validate: bool = True) -> BitBuffer:
     """
     Given a dictionary that maps byte values from 0 to 255 to huffman encodings, the function produces a bit stream
     that contains those encodings. The stream's length will vary depending on the encodings, in order to save as much
@@ -93,62 +137,59 @@ def turn_identifiers_into_bits(identifiers: dict[bytes, HuffmanEncoding]) -> Bit
     The next byte value is the original byte's value (the value that is encoded).
     The next half a byte (4 bits) will hold the length of the huffman encoding in BITS (not bytes). 4 bits allows
     for a maximum of 15 bits, or 32768 possible values for the encoding. This is enough values while also being pretty
-    compact in terms of memory.
+    compact in terms of memory (encodings longer than MAX_ENCODING_LENGTH are therefore rejected).
     The next bits will be the actual huffman encoding, and after them either the stream ends or the next identifier will
     be stored.
 
     :param identifiers: A dictionary mapping regular byte values to huffman encodings.
+    :param validate: Whether the dictionary should be validated first. Callers that built the dictionary themselves
+                     (and already know it's valid) can pass False to skip the validation.
     :return: A BitBuffer object holding the bits that describe the huffman encodings.
     :raises TypeError: If the argument isn't a dictionary mapping bytes to HuffmanEncoding objects.
-    :raises ValueError: If the amount of entries exceeds 256, or if the key of one of the entries contains multiple
-                        bytes (only one is allowed).
+    :raises ValueError: If the amount of entries exceeds 256, if the key of one of the entries contains multiple
+                        bytes (only one is allowed), or if one of the encodings is longer than MAX_ENCODING_LENGTH.
     """
     # If the dictionary is empty, return an empty bit buffer object:
     if len(identifiers) == 0:
         return BitBuffer()
 
     # Check that the dictionary has a maximum of 256 entries, and they all contain one byte as key:
-    __validate_identifiers_dict(identifiers)
+    if validate:
+        __validate_identifiers_dict(identifiers)
 
     # Initialize the bit buffer:
     bit_buffer: BitBuffer = BitBuffer()
 
-    # Write the number of identifiers minus 1:
-    identifiers_count = len(identifiers) - 1
-    bit_buffer.insert_bits(identifiers_count, 8)
-
-    # Insert the identifiers:
+    # The identifiers are accumulated in an integer (starting with the number of identifiers minus 1), which is moved
+    # to the buffer in whole 32 bits words:
+    acc, acc_bits = len(identifiers) - 1, 8
     for byte_val, short_encoding in identifiers.items():
-        __insert_identifier_to_buffer(byte_val, short_encoding, bit_buffer)
+        # The byte value (8 bits), the number of bits the short encoding takes up (4 bits, and make sure it is at least
+        # 1) and the actual bits of the encoding:
+        encoding_len = max(1, short_encoding.bit_length)
+        encoding = short_encoding.encoding & ((1 << encoding_len) - 1)
+        acc = (((((acc << 8) | byte_val[0]) << 4) | encoding_len) << encoding_len) | encoding
+        acc_bits += 12 + encoding_len
+
+        if acc_bits >= 32:
+            acc_bits -= 32
+            bit_buffer.insert_bits(acc >> acc_bits, 32)
+            acc &= (1 << acc_bits) - 1
+
+    # Insert the remaining bits:
+    if acc_bits > 0:
+        bit_buffer.insert_bits(acc, acc_bits)
 
     return bit_buffer
 
 
-def __insert_identifier_to_buffer(byte_val: bytes, short_encoding: HuffmanEncoding, buffer: BitBuffer) -> None:
-    """
-    Inserts the bits of the given huffman encoding into the bit buffer, according to the formatting of huffman encodings
-    as bits.
-    :param byte_val: The byte value that is encoded.
-    :param short_encoding: The short encoding given to the byte value.
-    :param buffer: The buffer that the encoding will be inserted into.
-    """
-    # Insert the byte value:
-    buffer.insert_bits(byte_val[0], 8)
-
-    # Insert the number of bits the short encoding takes up as a full byte (and make sure bit_length is at least 1):
-    buffer.insert_bits(max(1, short_encoding.bit_length), 8)
-
-    # Insert the actual bits of the encoding:
-    short_encoding.load_to_buffer(buffer)
-
-
 def __validate_identifiers_dict(identifiers: dict[bytes, HuffmanEncoding]) -> None:
     """
     Validates the type and length of the 'encodings' dictionary.
     :param identifiers: A dictionary mapping regular byte values to HuffmanEncoding objects.
     :raises TypeError: If the argument isn't a dictionary mapping bytes to HuffmanEncoding objects.
-    :raises ValueError: If the amount of entries exceeds 256, or if the key of one of the entries contains multiple
-                        bytes (only one is allowed).
+    :raises ValueError: If the amount of entries exceeds 256, if the key of one of the entries contains multiple
+                        bytes (only one is allowed), or if one of the encodings is longer than MAX_ENCODING_LENGTH.
     """
     # Check type:
     if not isinstance(identifiers, dict):
@@ -158,6 +199,14 @@ def __validate_identifiers_dict(identifiers: dict[bytes, HuffmanEncoding]) -> No
     elif len(identifiers) > 256:
         raise ValueError(f"The encodings dictionary can only contain 256 entries max ({len(identifiers)} received)")
 
+    # Check all entries in one pass first, and only look for the invalid entry if one of them failed:
+    if all(
+        type(key) is bytes and len(key) == 1 and type(value) is HuffmanEncoding
+        and value.bit_length <= MAX_ENCODING_LENGTH
+        for key, value in identifiers.items()
+    ):
+        return
+
     # Check key, value types:
     for key, value in identifiers.items():
         # Key check:
@@ -169,3 +218,7 @@ def __validate_identifiers_dict(identifiers: dict[bytes, HuffmanEncoding]) -> No
         # Value check:
         if not isinstance(value, HuffmanEncoding):
             raise TypeError(f"Dictionary should use `HuffmanEncoding` as value type (got {type(value)} instead)")
+        elif value.bit_length > MAX_ENCODING_LENGTH:
+            raise ValueError(
+                f"Encodings can only be {MAX_ENCODING_LENGTH} bits long (got {value.bit_length} bits for {key})"
+            )
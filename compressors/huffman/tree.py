@@ -1,4 +1,5 @@
-from queue import PriorityQueue
+import util
+from itertools import compress
 from typing import Optional, Sequence
 from compressors.huffman.identifiers import HuffmanEncoding
 
@@ -26,19 +27,40 @@ class HuffmanTree:
                 self, char: Optional[bytes], frequency: int, left: Optional['HuffmanTree.Node'],
                 right: Optional['HuffmanTree.Node']
         ):
-            # Assign to properties (type checking done automatically):
-            self.char, self.frequency = char, frequency
-            self.left, self.right = left, right
+            # Assign directly to the slots. The tree only creates nodes from values it already knows are valid, so the
+            # properties' type checking is skipped here (use `validated_create` for values that need to be checked):
+            self.__byte_val, self.__freq = char, frequency
+            self.__left, self.__right = left, right
 
-        # Define 'less than' in order to use the Node class in a priority queue:
-        def __lt__(self, other: 'HuffmanTree.Node') -> bool:
-            return self.frequency < other.frequency
+        @classmethod
+        def validated_create(
+                cls, char: Optional[bytes], frequency: int, left: Optional['HuffmanTree.Node'],
+                right: Optional['HuffmanTree.Node']
+        ) -> 'HuffmanTree.Node':
+            """
+            Creates a node while validating its values, unlike the constructor which assigns them as they are.
+            :raises TypeError: If one of the values is of the wrong type.
+            :raises ValueError: If char isn't exactly one byte long, or if frequency is negative.
+            """
+            # Assign to properties (type checking done automatically):
+            node = cls.__new__(cls)
+            node.char, node.frequency = char, frequency
+            node.left, node.right = left, right
+            return node
 
         def __str__(self):
-            if self.char is None:
-                return str(self.left) + str(self.right)
-            else:
-                return chr(self.char[0])
+            # Collect the characters of the leaves from left to right, using an explicit stack (joining them once at
+            # the end instead of concatenating strings at every level of the tree):
+            chars: list[int] = []
+            stack: list[HuffmanTree.Node] = [self]
+            while stack:
+                node = stack.pop()
+                if node.char is None:
+                    stack.append(node.right)
+                    stack.append(node.left)
+                else:
+                    chars.append(node.char[0])
+            return ''.join(map(chr, chars))
 
         def is_leaf(self) -> bool:
             """
@@ -57,11 +79,12 @@ class HuffmanTree:
 
         @char.setter
         def char(self, value: Optional[bytes]) -> None:
-            # Type check:
-            if value is not None and not isinstance(value, bytes):
-                raise TypeError(f"Expected value of type 'bytes', or None, got {type(value)} instead")
-            elif value is not None and len(value) != 1:
-                raise ValueError(f"Expected a bytes object of length 1, got length {len(value)} instead")
+            # Type check (an exact type check, which is cheaper than `isinstance`):
+            if value is not None:
+                if type(value) is not bytes:
+                    raise TypeError(f"Expected value of type 'bytes', or None, got {type(value)} instead")
+                elif len(value) != 1:
+                    raise ValueError(f"Expected a bytes object of length 1, got length {len(value)} instead")
 
             # NOW set the value:
             self.__byte_val: Optional[bytes] = value
@@ -93,8 +116,8 @@ class HuffmanTree:
 
         @left.setter
         def left(self, value: Optional['HuffmanTree.Node']) -> None:
-            # Type check:
-            if value is not None and not isinstance(value, HuffmanTree.Node):
+            # Type check (an exact type check, which is cheaper than `isinstance`):
+            if value is not None and type(value) is not HuffmanTree.Node:
                 raise TypeError(f"Expected another HuffmanTree.Node object, or None, got {type(value)} instead")
             self.__left: Optional['HuffmanTree.Node'] = value
 
@@ -107,14 +130,24 @@ class HuffmanTree:
 
         @right.setter
         def right(self, value: Optional['HuffmanTree.Node']) -> None:
-            # Type check:
-            if value is not None and not isinstance(value, HuffmanTree.Node):
+            # Type check (an exact type check, which is cheaper than `isinstance`):
+            if value is not None and type(value) is not HuffmanTree.Node:
                 raise TypeError(f"Expected another HuffmanTree.Node object, or None, got {type(value)} instead")
             self.__right: Optional['HuffmanTree.Node'] = value
 
     __slots__ = [
-        # The root node of the huffman tree (an optional node):
-        '__root',
+        # The tree is stored as parallel lists indexed by node ids (instead of linked Node objects). The leaves come
+        # first, sorted by frequency, followed by the merged nodes in the order they were created. This means a node's
+        # children always have smaller ids than it, and the root is the last node.
+
+        # The byte value that every node represents (-1 for nodes that aren't leaves):
+        '__byte_vals',
+
+        # The frequency of every node (for nodes that aren't leaves, the sum of their children's frequencies):
+        '__freqs',
+
+        # The ids of the left and right children of every node (-1 for leaves):
+        '__lefts', '__rights'
     ]
 
     def __init__(self, byte_frequencies: Sequence[int]):
@@ -124,67 +157,132 @@ class HuffmanTree:
                                  with value 'i' in the data.
         :raises ValueError: If the length of the sequence is not exactly 256, or if one of the frequencies is negative.
         """
-        # Ensure the length is indeed 256:
+        # Ensure the length is indeed 256 and the frequencies aren't negative:
         if len(byte_frequencies) != 256:
             raise ValueError(f"Expected a sequence of length 256, got {len(byte_frequencies)} instead")
+        elif min(byte_frequencies) < 0:
+            raise ValueError(f"Expected non-negative frequencies, got {min(byte_frequencies)} instead")
 
-        # Get a priority queue of nodes based on the frequencies:
-        nodes_queue: PriorityQueue['HuffmanTree.Node'] = HuffmanTree.__get_nodes_priority_queue(byte_frequencies)
+        # Create a leaf for all byte values whose frequency isn't 0, sorted based on the frequency of the byte value. The
+        # zero frequencies are skipped by `compress` without a Python-level check, and since the sort is stable, byte
+        # values with equal frequencies stay sorted by their value:
+        self.__byte_vals: list[int] = sorted(compress(range(256), byte_frequencies), key=byte_frequencies.__getitem__)
+        self.__freqs: list[int] = list(map(byte_frequencies.__getitem__, self.__byte_vals))
+        leaves_count = len(self.__byte_vals)
 
-        # Merge every two least-frequent nodes until there's only one left:
-        while nodes_queue.qsize() >= 2:
-            # Construct a parent - left child will have a smaller frequency:
-            a, b = nodes_queue.get_nowait(), nodes_queue.get_nowait()
-            left = min(a, b)
-            right = b if left is a else a
-            parent = HuffmanTree.Node(None, left.frequency + right.frequency, left, right)
+        # Every merge turns two nodes into one, so the tree has exactly 2 * leaves_count - 1 nodes. Allocate all of them
+        # up front (the merged nodes are filled in below, instead of growing the lists one node at a time):
+        merged_count = max(0, leaves_count - 1)
+        self.__byte_vals.extend([-1] * merged_count)
+        self.__freqs.extend([0] * merged_count)
+        self.__lefts: list[int] = [-1] * (leaves_count + merged_count)
+        self.__rights: list[int] = [-1] * (leaves_count + merged_count)
 
-            # Return the parent to the queue:
-            nodes_queue.put_nowait(parent)
+        # Merged nodes are created in non-decreasing frequency order, so the leaves and the merged nodes are two sorted
+        # queues, and the two least-frequent nodes are always at their fronts (this builds the tree in linear time after
+        # sorting, without any heap operations). The fronts of the queues are the following ids:
+        next_leaf, next_merged = 0, leaves_count
 
-        # Get the root (if all byte frequencies were zero, the queue is empty and the root is None):
-        self.__root: Optional['HuffmanTree.Node'] = None if nodes_queue.empty() else nodes_queue.get_nowait()
+        # Merge every two least-frequent nodes until there's only one left (the merged nodes before `parent` were
+        # already created):
+        freqs = self.__freqs
+        for parent in range(leaves_count, leaves_count + merged_count):
+            # Take the two least frequent nodes - left child will have a smaller frequency (it is taken first). Prefer
+            # leaves on ties:
+            children = []
+            for _ in range(2):
+                if next_merged == parent or (next_leaf < leaves_count and freqs[next_leaf] <= freqs[next_merged]):
+                    children.append(next_leaf)
+                    next_leaf += 1
+                else:
+                    children.append(next_merged)
+                    next_merged += 1
+
+            # Construct their parent:
+            left, right = children
+            freqs[parent] = freqs[left] + freqs[right]
+            self.__lefts[parent], self.__rights[parent] = left, right
 
-    def get_encodings(self: 'HuffmanTree') -> dict[bytes, int]:
+    def get_encodings(self: 'HuffmanTree') -> dict[bytes, HuffmanEncoding]:
         """
         Given the current huffman tree, the method assigns each byte value inside it a huffman encoding - a potentially
         shorter value based on the structure of the tree.
+        Only the length of each encoding is taken from the tree (the depth of the byte value's leaf). The encodings
+        themselves are canonical: byte values sorted by (length, value) receive consecutive encodings, shifted left
+        whenever the length grows. This keeps the lengths of the tree while making the encodings depend on them only.
         The returned dictionary uses the original byte values as keys, and the huffman encodings as values.
         :return: A dictionary mapping between the original byte values and the shorter huffman encodings that were
                  assigned to them. Since the huffman tree only refers to byte values, the maximum amount of entries in
                  the dictionary is 256.
         """
-        # Create the dictionary:
+        # Assign the canonical encodings - every group receives consecutive encodings, starting right after the previous
+        # group's encodings, shifted left by one bit per length:
         encodings: dict[bytes, HuffmanEncoding] = {}
+        code = 0
+        for length, group in enumerate(self.__get_length_groups()):
+            for byte_val in group:
+                encodings[util.SINGLE_BYTES[byte_val]] = HuffmanEncoding(length, code)
+                code += 1
+            code <<= 1
 
-        # Use recursion to find leaf nodes:
-        def dfs(node: Optional[HuffmanTree.Node], code: int, depth: int):
-            if node is not None:
-                # if it's a leaf, assign an encoding:
-                if node.is_leaf():
-                    encodings[node.char] = HuffmanEncoding(depth, code)
-                # If not, assign 0 to left and 1 to right:
-                else:
-                    dfs(node.left, code << 1, depth + 1)
-                    dfs(node.right, (code << 1) | 1, depth + 1)
-
-        dfs(self.root, 0, 0)
         return encodings
 
+    def get_encoding_tables(self) -> tuple[list[int], list[int]]:
+        """
+        Assigns each byte value inside the tree the same canonical huffman encoding as `get_encodings`, but returns the
+        encodings as two tables indexed by the byte value (so looking up the encoding of a byte doesn't require any
+        hashing, or any HuffmanEncoding objects).
+        :return: A list of length 256, where the element at index 'i' is the huffman encoding of the byte 'i', and a
+                 list of length 256, where the element at index 'i' is the length in bits of that encoding. Both are 0
+                 for byte values that aren't in the tree (and the length is also 0 if the tree has a single leaf).
+        """
+        codes, lengths = [0] * 256, [0] * 256
+        code = 0
+        for length, group in enumerate(self.__get_length_groups()):
+            for byte_val in group:
+                codes[byte_val], lengths[byte_val] = code, length
+                code += 1
+            code <<= 1
+
+        return codes, lengths
+
+    def __get_length_groups(self) -> list[list[int]]:
+        """
+        Only the length of each encoding is taken from the tree (the depth of the byte value's leaf), so the method
+        groups the byte values in the tree by the lengths of their encodings.
+        :return: A list where the element at index 'i' is a sorted list of the byte values whose encoding is 'i' bits
+                 long.
+        """
+        # Find the depth of every node. A node's children have smaller ids than it, so going over the ids from the root
+        # (the last one) downwards sets a node's depth before its children's:
+        depths: list[int] = [0] * len(self.__freqs)
+        for node_id in reversed(range(len(depths))):
+            left = self.__lefts[node_id]
+            if left != -1:
+                depths[left] = depths[self.__rights[node_id]] = depths[node_id] + 1
+
+        # The depth of a leaf is the length of its encoding (leaves are the first nodes, the only ones with a byte value).
+        # Group the byte values by the lengths of their encodings, keeping every group sorted by value:
+        leaves_count = self.__byte_vals.index(-1) if -1 in self.__byte_vals else len(self.__byte_vals)
+        length_groups: list[list[int]] = [[] for _ in range(max(depths, default=0) + 1)]
+        for byte_val, depth in sorted(zip(self.__byte_vals[:leaves_count], depths)):
+            length_groups[depth].append(byte_val)
+
+        return length_groups
+
     @property
     def root(self) -> Optional['HuffmanTree.Node']:
         """
+        The tree isn't stored as Node objects, so the nodes are created from the tree's lists whenever this property is
+        accessed.
         :return: The root node of the huffman tree. If the tree is empty, None is returned.
         """
-        return self.__root
-
-    @staticmethod
-    def __get_nodes_priority_queue(byte_frequencies: Sequence[int]) -> PriorityQueue['HuffmanTree.Node']:
-        # Insert all byte values whose frequency isn't 0 into a priority queue. The queue will be sorted based on the
-        # frequency of the byte value:
-        nodes: PriorityQueue['HuffmanTree.Node'] = PriorityQueue(maxsize=256)
-        for byte_val, byte_freq in enumerate(byte_frequencies):
-            if byte_freq != 0:
-                node = HuffmanTree.Node(bytes([byte_val]), byte_freq, None, None)
-                nodes.put_nowait(node)
-        return nodes
+        # A node's children have smaller ids than it, so they are always created before it:
+        nodes: list[HuffmanTree.Node] = []
+        for byte_val, freq, left, right in zip(self.__byte_vals, self.__freqs, self.__lefts, self.__rights):
+            if byte_val != -1:
+                nodes.append(HuffmanTree.Node(util.SINGLE_BYTES[byte_val], freq, None, None))
+            else:
+                nodes.append(HuffmanTree.Node(None, freq, nodes[left], nodes[right]))
+
+        return nodes[-1] if nodes else None
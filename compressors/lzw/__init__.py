@@ -1,5 +1,6 @@
+from array import array
+from itertools import count
 from typing import Generator
-from collections import deque
 from compressors import Compressor
 from compressors.lzw.lzw_indices import EncodingIndices
 from compressors.lzw.memory_limits import TooManyEncodingsException, OutOfMemoryStrategy
@@ -41,36 +42,50 @@ class LzwCompressor(Compressor):
         # Parse indices:
         indices = EncodingIndices(input_data, self.__max_dict_size, self.__mem_strategy)
 
-        # Pad and return them:
+        # Pack and return them:
         return indices.get_padded_bytes()
 
     @staticmethod
     def encoded_indices_iterator(compressed_data: bytes) -> Generator[int, None, None]:
         """
         Provides a generator iterating through the compressed data and removing the padding from it.
-        The generator will extract the encoded indices in the data.
+        The generator will extract the encoded indices in the data, reading every index with the same width the encoder
+        used for it (see `EncodingIndices.get_padded_bytes`).
         :param compressed_data: Data that was compressed using the LzwCompressor class.
-        :raises ValueError: If either a length byte has a non-positive value, or there aren't enough bytes
-                            following said length byte.
+        :raises ValueError: If either the width byte is smaller than 8, or the bits after the last index aren't zeroes.
         """
-        byte_idx = 0
-        while byte_idx < len(compressed_data):
-            # Get the length byte:
-            index_len = compressed_data[byte_idx]
-            byte_idx += 1
-
-            # Validate length:
-            if index_len <= 0:
-                raise ValueError(f'Malformed compressed data: Invalid value for length byte ({index_len})')
-            elif byte_idx + index_len > len(compressed_data):
-                raise ValueError(f'Malformed compressed data: Not enough bytes for index')
-
-            # Convert the next bytes to integer (remember little indian - significant byte is last):
-            index = int.from_bytes(compressed_data[byte_idx:byte_idx + index_len], byteorder='little')
-
-            # Move the byte index the rest of the bytes:
-            byte_idx += index_len
-            yield index
+        # Empty data contains no indices:
+        if len(compressed_data) == 0:
+            return
+
+        # Get the width byte:
+        max_width = compressed_data[0]
+        if max_width < 8:
+            raise ValueError(f'Malformed compressed data: Invalid value for width byte ({max_width})')
+
+        # The bits are moved from the data into an integer one byte at a time, and the indices are read from its top:
+        acc, acc_bits, byte_idx = 0, 0, 1
+        width, widening_idx = 8, 1
+        for k in count():
+            # Follow the width the encoder used:
+            if k == widening_idx and width < max_width:
+                width += 1
+                widening_idx = (1 << width) - 255
+
+            while acc_bits < width and byte_idx < len(compressed_data):
+                acc = (acc << 8) | compressed_data[byte_idx]
+                acc_bits += 8
+                byte_idx += 1
+
+            # Not enough bits are left for another index, so they must be the padding:
+            if acc_bits < width:
+                if acc != 0:
+                    raise ValueError('Malformed compressed data: Padding bits must be zeroes')
+                return
+
+            acc_bits -= width
+            yield acc >> acc_bits
+            acc &= (1 << acc_bits) - 1
 
     def decode(self, compressed_data: bytes) -> bytes:
         """
@@ -81,48 +96,53 @@ class LzwCompressor(Compressor):
         :return: The decompressed bytes of the given data.
         :raises ValueError: If the data is not padded correctly and reading indices from it fails.
         """
-        # The decoding dictionary is easier so just use a normal dictionary (and a keys set for faster
-        # lookup):
+        # Write the output into a single growing buffer (instead of keeping every decoded bytes object and joining them
+        # at the end):
+        output: bytearray = bytearray()
+
+        # Every value in the decoding dictionary is a value that was emitted, followed by the first byte of the value
+        # emitted right after it - and these bytes already sit next to each other in the output. So instead of copying
+        # them, every dictionary entry (starting from index 256) is saved as its offset in the output and its length
+        # (in two separate arrays of 64 bits integers, so adding an entry doesn't create a tuple or any int objects). An
+        # index is in the dictionary exactly when it's smaller than unoccupied_idx:
         unoccupied_idx = 256
-        keys: set[int] = set()
-        decoder_dict: dict[int, bytes] = {}
+        entries_starts: array = array('Q')
+        entries_lens: array = array('Q')
 
-        # Prepare the output in a deque for memory optimization:
-        output: deque[bytes] = deque()
-        last_emitted: bytes = b''
+        # The offset in the output and the length of the last emitted value (a length of 0 means nothing was emitted):
+        last_start, last_len = 0, 0
 
         for encoded_idx in LzwCompressor.encoded_indices_iterator(compressed_data):
-            # Check if the index is in the dictionary (smaller than unoccupied_idx), or is ascii:
-            is_ascii, is_in_dict = encoded_idx < 256, encoded_idx < unoccupied_idx
-            if is_ascii or is_in_dict:
-                # Get the corresponding bytes and add them to the output:
-                decoded = bytes([encoded_idx]) if is_ascii else decoder_dict[encoded_idx]
-                output.append(decoded)
-
-                # Add the last emitted bytes object along with the first byte of the decoded
-                # bytes to the dictionary (only if the result is not an ascii value!):
-                if len(last_emitted) > 0:
-                    decoder_dict[unoccupied_idx] = last_emitted + bytes([decoded[0]])
-                    keys.add(unoccupied_idx)
-                    unoccupied_idx += 1
-
-                # Switch the last emitted:
-                last_emitted = decoded
-
-            # It's ok if the index is completely new, but make sure it is legit and the last emitted
-            # bytes object isn't empty (in a correct compression, first index is always below 256,
-            # but the index reader may read an invalid index):
-            elif len(last_emitted) == 0:
-                raise ValueError('Malformed compressed data: Invalid index value at the start')
-
-            # If the index is completely new, add the first byte of the last emitted bytes to itself,
-            # and add the result to both the dictionary and the output:
-            else:
-                last_emitted = last_emitted + bytes([last_emitted[0]])
-                output.append(last_emitted)
+            start = len(output)
+
+            # If the index is ascii, its value is the byte itself:
+            if encoded_idx < 256:
+                output.append(encoded_idx)
 
-                decoder_dict[unoccupied_idx] = last_emitted
-                keys.add(unoccupied_idx)
+            # If the index is in the dictionary, copy its bytes from the earlier part of the output:
+            elif encoded_idx < unoccupied_idx:
+                entry_start = entries_starts[encoded_idx - 256]
+                output += output[entry_start:entry_start + entries_lens[encoded_idx - 256]]
+
+            # It's ok if the index is completely new (the one about to be added), but make sure the last emitted value
+            # isn't empty (in a correct compression, first index is always below 256, but the index reader may read an
+            # invalid index):
+            elif encoded_idx > unoccupied_idx or last_len == 0:
+                raise ValueError(f'Malformed compressed data: Invalid index value ({encoded_idx})')
+
+            # If the index is completely new, its value is the last emitted value followed by its own first byte:
+            else:
+                output += output[last_start:last_start + last_len]
+                output.append(output[last_start])
+
+            # Add the last emitted value along with the first byte of the current value to the dictionary (only if
+            # something was emitted before):
+            if last_len > 0:
+                entries_starts.append(last_start)
+                entries_lens.append(last_len + 1)
                 unoccupied_idx += 1
 
-        return b''.join(output)
+            # Switch the last emitted:
+            last_start, last_len = start, len(output) - start
+
+        return bytes(output)
@@ -1,9 +1,14 @@
+from typing import Callable, Optional
 from compressors.lzw.memory_limits import TooManyEncodingsException, OutOfMemoryStrategy
 
 
 class EncodingDict:
     """
-    A class representing the dictionary used in the encoding step of the LZW algorithm
+    A class representing the dictionary used in the encoding step of the LZW algorithm.
+    Every multiple bytes value in the dictionary is made of a shorter value that is also in the dictionary (its prefix)
+    and one extra byte, so instead of saving whole byte slices the dictionary saves every value as the index of its
+    prefix and its last byte. This way extending a matching value by one byte is a single lookup of two integers, no
+    matter how long the value is.
     """
 
     # Error messages:
@@ -14,18 +19,19 @@ class EncodingDict:
     __SETTING_ASCII_KEYS_MSG = 'Single byte values cannot be changed'
     __INVALID_INDEX_TYPE_MSG = 'LZW encoder dictionary can only use int as a value'
     __QUERY_NOT_FOUND_MSG = "Byte slice '{}' was not saved in the dictionary"
+    __INVALID_EXTENSION_TYPE_MSG = 'LZW encoder dictionary extensions must be made of a prefix index and a byte value'
+    __INVALID_PREFIX_INDEX_MSG = 'Prefix index {} is not saved in the dictionary'
+    __INVALID_BYTE_VALUE_MSG = 'Byte value must be in the range [0, 256) (got {})'
 
     __slots__ = [
-        # A Set holding every key created (optimizes key lookups):
-        '__keys_set',
-
         # The smallest unoccupied index that we can insert to:
         '__unoccupied_idx',
 
         # The maximum amount of entries in the dictionary (apart from ascii values):
         '__max_size',
 
-        # The multiple bytes values saved in the dictionary:
+        # The multiple bytes values saved in the dictionary, as (the index of the value without its last byte, the last
+        # byte) pairs:
         '__encoded_values'
     ]
 
@@ -40,20 +46,31 @@ class EncodingDict:
         self.__max_size = max_dict_size
 
         # Initialize stuff:
-        self.__keys_set: set[bytes] = set()
         self.__unoccupied_idx: int = 256
-        self.__encoded_values: dict[bytes, int] = {}
+        self.__encoded_values: dict[tuple[int, int], int] = {}
 
     def __getitem__(self, item: bytes) -> int:
         # Validate the query:
         EncodingDict.__validate_query(item)
 
         # Check if the item exists as a key:
-        if not self.contains_key(item):
+        index = self.__find_index(item)
+        if index is None:
             raise KeyError(EncodingDict.__QUERY_NOT_FOUND_MSG.format(item))
 
-        # If it's of length one, return its ascii value. If not, return the saved value:
-        return ord(item) if len(item) == 1 else self.__encoded_values[item]
+        return index
+
+    def get_extension(self, prefix_idx: int, byte_val: int) -> Optional[int]:
+        """
+        Returns the index of a value in the dictionary, given the index of the value without its last byte.
+        This method is called for every byte of the encoded data, so unlike the other methods it doesn't validate its
+        arguments - an invalid prefix index or byte value simply isn't found in the dictionary.
+        :param prefix_idx: The index of the value without its last byte.
+        :param byte_val: The last byte of the value.
+        :return: The index of the value in the dictionary, or None if the prefix extended by the byte value was not
+                 saved in the dictionary.
+        """
+        return self.__encoded_values.get((prefix_idx, byte_val))
 
     def try_insert(self, key: bytes, memory_strategy: OutOfMemoryStrategy) -> bool:
         """
@@ -65,7 +82,10 @@ class EncodingDict:
                                 is full.
         :return: True if the key was added, false otherwise.
         :raises TypeError: If the key isn't of type bytes
-        :raises ValueError: If the key is of length 0.
+        :raises ValueError: If the key is of length 0, or the memory strategy isn't one of OutOfMemoryStrategy's
+                            values.
+        :raises KeyError: If the key without its last byte was not saved in the dictionary (every value in an LZW
+                          dictionary extends a shorter value by one byte).
         :raises TooManyEncodingsException: If, after the insertion of the key, the amount of entries exceeds the allowed
                                            amount. This is only raised if OutOfMemoryStrategy.ABORT was given to the
                                            method.
@@ -75,32 +95,63 @@ class EncodingDict:
         if self.contains_key(key):
             return False
 
-        # Check if there is enough memory:
-        if len(self) >= self.max_size:
-            match memory_strategy:
-                # Raise an exception:
-                case OutOfMemoryStrategy.ABORT:
-                    raise TooManyEncodingsException()
-                # Do not perform the insertion:
-                case OutOfMemoryStrategy.STOP_STORE:
-                    return False
-                # Increase the maximum size:
-                case OutOfMemoryStrategy.USE_MINIMUM_REQUIRED:
-                    self.__max_size += 1
-
-        # Insert the key:
-        self.__encoded_values[key] = self.__unoccupied_idx
+        # Insert it as an extension of its prefix:
+        return self.try_insert_extension(self[key[:-1]], key[-1], memory_strategy)
+
+    def try_insert_extension(
+            self, prefix_idx: int, byte_val: int, memory_strategy: OutOfMemoryStrategy, validate: bool = True
+    ) -> bool:
+        """
+        Inserts the value at the given index, extended by the given byte, into the dictionary. The index that the new
+        value will be mapped to will be the smallest unoccupied index found.
+        If the value was already saved in the dictionary, nothing will change.
+        :param prefix_idx: The index of the value that will be extended.
+        :param byte_val: The byte that extends the value.
+        :param memory_strategy: The chosen strategy for handling cases where an insertion is made while the dictionary
+                                is full.
+        :param validate: Whether the prefix index, the byte value and the memory strategy should be validated first.
+                         Callers that got the index and the byte from the dictionary and the input data (and pass an
+                         OutOfMemoryStrategy member) can pass False to skip the validation.
+        :return: True if the value was added, false otherwise.
+        :raises TypeError: If the prefix index or the byte value aren't integers.
+        :raises ValueError: If the prefix index isn't an index in the dictionary, the byte value isn't in the range
+                            [0, 256), or the memory strategy isn't one of OutOfMemoryStrategy's values.
+        :raises TooManyEncodingsException: If, after the insertion of the value, the amount of entries exceeds the
+                                           allowed amount. This is only raised if OutOfMemoryStrategy.ABORT was given to
+                                           the method.
+        """
+        # Validate the extension (and turn the strategy into a member, since it's compared by identity below) and make
+        # sure it isn't already saved:
+        if validate:
+            self.__validate_extension(prefix_idx, byte_val)
+            memory_strategy = OutOfMemoryStrategy(memory_strategy)
+        if (prefix_idx, byte_val) in self.__encoded_values:
+            return False
+
+        # Check if there is enough memory (once the dictionary is full this happens on every insertion, so the
+        # strategies that keep the algorithm going are checked first - looking up an enum member isn't free):
+        if len(self.__encoded_values) >= self.__max_size:
+            # Do not perform the insertion:
+            if memory_strategy is OutOfMemoryStrategy.STOP_STORE:
+                return False
+            # Increase the maximum size:
+            elif memory_strategy is OutOfMemoryStrategy.USE_MINIMUM_REQUIRED:
+                self.__max_size += 1
+            # Raise an exception:
+            elif memory_strategy is OutOfMemoryStrategy.ABORT:
+                raise TooManyEncodingsException()
+
+        # Insert the extension:
+        self.__encoded_values[(prefix_idx, byte_val)] = self.__unoccupied_idx
         self.__unoccupied_idx += 1
-        self.__keys_set.add(key)
 
         return True
 
     def __len__(self):
-        return len(self.__keys_set)
+        return len(self.__encoded_values)
 
     def contains_key(self, key: bytes) -> bool:
-        is_ascii_value = len(key) == 1 and ord(key) < 256
-        return is_ascii_value or key in self.__keys_set
+        return self.__find_index(key) is not None
 
     def clear(self) -> None:
         """
@@ -109,9 +160,34 @@ class EncodingDict:
         The maximum amount of entries that can be saved in the dictionary is not changed.
         """
         self.__unoccupied_idx = 256
-        self.__keys_set.clear()
         self.__encoded_values.clear()
 
+    def __find_index(self, key: bytes) -> Optional[int]:
+        """
+        Finds the index of a key by starting at its first byte (which is built-in), and extending it one byte at a time.
+        :param key: A bytes object.
+        :return: The index of the key in the dictionary, or None if it was not saved in the dictionary.
+        """
+        if len(key) == 0:
+            return None
+
+        index = key[0]
+        for byte_val in key[1:]:
+            index = self.__encoded_values.get((index, byte_val))
+            if index is None:
+                return None
+
+        return index
+
+    def __validate_extension(self, prefix_idx, byte_val) -> None:
+        # The prefix must be an index in the dictionary, and the byte must be a byte value:
+        if not isinstance(prefix_idx, int) or not isinstance(byte_val, int):
+            raise TypeError(EncodingDict.__INVALID_EXTENSION_TYPE_MSG)
+        elif not 0 <= prefix_idx < self.__unoccupied_idx:
+            raise ValueError(EncodingDict.__INVALID_PREFIX_INDEX_MSG.format(prefix_idx))
+        elif not 0 <= byte_val < 256:
+            raise ValueError(EncodingDict.__INVALID_BYTE_VALUE_MSG.format(byte_val))
+
     @staticmethod
     def __validate_query(query) -> None:
         # The query must be a non-empty bytes object:
@@ -120,6 +196,15 @@ class EncodingDict:
         elif len(query) == 0:
             raise ValueError(EncodingDict.__EMPTY_QUERY_MSG)
 
+    @property
+    def extension_getter(self) -> Callable[[tuple[int, int]], Optional[int]]:
+        """
+        A function that works like `get_extension`, but receives the prefix index and the byte value as one tuple.
+        It is the lookup method of the dictionary's underlying storage, so a caller that extends a value for every byte
+        of its input can use it to skip a Python-level call per byte. The function stays valid after `clear` is called.
+        """
+        return self.__encoded_values.get
+
     @property
     def max_size(self) -> int:
         """
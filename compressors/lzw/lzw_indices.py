@@ -1,4 +1,4 @@
-from collections import deque
+from itertools import islice
 from compressors.lzw.encoding_dict import EncodingDict
 from compressors.lzw.memory_limits import OutOfMemoryStrategy
 
@@ -8,74 +8,109 @@ class EncodingIndices:
     A class encapsulating the logic behind converting input data into indices inside an LZW dictionary.
     """
     __slots__ = (
-        # The indices of the encoded data inside the lzw dictionary:
-        '__indices',
+        # The indices of the encoded data inside the lzw dictionary, packed as bytes (see `get_padded_bytes`):
+        '__packed_indices',
     )
 
     def __init__(self, input_data: bytes, max_dict_size: int, memory_strategy: OutOfMemoryStrategy) -> 'EncodingIndices':
         """
-        Parses the input data into encoding indices inside an LZW dictionary.
+        Parses the input data into encoding indices inside an LZW dictionary. The indices are packed as soon as they are
+        found (instead of being collected and packed in a second pass).
         :param input_data: The input that will be compressed into indices.
         :param max_dict_size: The maximum amount of entries the LZW dictionary can contain.
         :param memory_strategy: In case encoding the data requires more entries than 'max_dict_size' this parameter
                                 informs the method which actions to take.
+        :raises ValueError: If the memory strategy isn't one of OutOfMemoryStrategy's values.
         :raises TooManyEncodingsException: If not enough memory was given to the encoding dictionary
                                            in order to complete the algorithm, and OutOfMemoryStrategy.ABORT was
                                            provided as an argument.
         """
-        # Initialize the dictionary:
+        # Initialize the dictionary, and turn the strategy into a member (the strategy is compared by identity, and
+        # the dictionary won't validate it for every insertion):
         lzw_dict: EncodingDict = EncodingDict(max_dict_size)
+        memory_strategy = OutOfMemoryStrategy(memory_strategy)
 
-        # The starting index of the slice that matches a dictionary value:
-        matching_start_idx: int = 0
-        self.__indices: deque[int] = deque()
+        self.__packed_indices: bytearray = bytearray()
+        if len(input_data) == 0:
+            return
 
-        for i in range(1, len(input_data)):
-            # Get the current data slice:
-            current_data = input_data[matching_start_idx:i + 1]
+        # The packed indices start with the width of the largest index:
+        max_width = EncodingIndices.__get_max_width(max_dict_size, memory_strategy)
+        self.__packed_indices.append(max_width)
 
-            # If it's not in the dictionary, insert the index of the previous slice, and
-            # add the new slice to the dictionary:
-            if not lzw_dict.contains_key(current_data):
-                prev_matching = input_data[matching_start_idx:i]
-                self.__indices.append(lzw_dict[prev_matching])
+        # The indices are accumulated in an integer and written out in whole 64 bits words. The width grows when the
+        # amount of indices that were written reaches the next power of two (minus 255):
+        acc, acc_bits = 0, 0
+        width, widening_idx, written_count = 8, 1, 0
 
-                lzw_dict.try_insert(current_data, memory_strategy)
-                matching_start_idx = i
+        # The index of the longest prefix (of the remaining input) that matches a dictionary value. Every value is
+        # extended by one byte at a time, so only the index of the matching value needs to be kept (and not the bytes
+        # themselves):
+        matching_idx: int = input_data[0]
 
-        # In case the end of the input matched a dictionary value, the loop didn't append it:
-        forgotten = input_data[matching_start_idx:]
-        if len(forgotten) > 0:
-            self.__indices.append(lzw_dict[forgotten])
+        # The dictionary is queried for every byte, so look its methods up once (and query its storage directly):
+        get_extension, try_insert_extension = lzw_dict.extension_getter, lzw_dict.try_insert_extension
 
-    @property
-    def indices(self) -> deque[int]:
-        return self.__indices
+        for byte_val in islice(input_data, 1, None):
+            # If the matching value extended by the current byte is in the dictionary, keep matching:
+            extension_idx = get_extension((matching_idx, byte_val))
+            if extension_idx is not None:
+                matching_idx = extension_idx
+
+            # If not, write the index of the matching value, and add its extension to the dictionary:
+            else:
+                if written_count == widening_idx and width < max_width:
+                    width += 1
+                    widening_idx = (1 << width) - 255
+                acc = (acc << width) | matching_idx
+                acc_bits += width
+                written_count += 1
+                if acc_bits >= 64:
+                    acc_bits -= 64
+                    self.__packed_indices += (acc >> acc_bits).to_bytes(8, 'big')
+                    acc &= (1 << acc_bits) - 1
+
+                # The matching index came from the dictionary and the byte from the input, so skip validating them:
+                try_insert_extension(matching_idx, byte_val, memory_strategy, validate=False)
+                matching_idx = byte_val
+
+        # The end of the input matched a dictionary value, but the loop didn't write it:
+        if written_count == widening_idx and width < max_width:
+            width += 1
+        acc = (acc << width) | matching_idx
+        acc_bits += width
+
+        # Pad the remaining bits with zeroes to a whole byte:
+        padding = -acc_bits % 8
+        self.__packed_indices += (acc << padding).to_bytes((acc_bits + padding) // 8, 'big')
+
+    @staticmethod
+    def __get_max_width(max_dict_size: int, memory_strategy: OutOfMemoryStrategy) -> int:
+        """
+        Calculates the width of the largest index that encoding may produce, which caps the width of all indices.
+        :param max_dict_size: The maximum amount of entries the LZW dictionary can contain.
+        :param memory_strategy: The strategy used when the dictionary is full.
+        :return: The maximal width of an index in bits, which is at least 8 and at most 255 (it is saved in one byte).
+        """
+        # The dictionary can keep growing past its maximum size, so don't cap the indices' width:
+        if memory_strategy is OutOfMemoryStrategy.USE_MINIMUM_REQUIRED:
+            return 255
+
+        # Otherwise every index is smaller than 256 + max_dict_size:
+        return min(255, max(8, (255 + max_dict_size).bit_length()))
 
     def get_padded_bytes(self) -> bytes:
         """
         When compressing the indices, the decompression algorithm needs to know where an index starts and end.
-        One approach is to decide on a fixed size for all of them, however this wastes space.
-        The current method pads the indices as bytes in the following way:
-            Before every index, an extra byte is added. This byte will tell the decompression algorithm
-            how many bytes to read for the next index.
-        This method adds only one extra byte per index, which is more efficient than the other approach mentioned above.
-        :return: A bytes object containing the indices in the object, along with extra bytes to allow the decompression
-                 algorithm to read the indices.
+        Every index is written with just enough bits to hold any index that could appear at its position: before the
+        k-th index (counting from 0) at most k values were added to the dictionary, so it is smaller than 256 + k and
+        (255 + k).bit_length() bits are enough. The width therefore grows from 8 bits by one bit whenever the dictionary
+        could have doubled, up to the width of the largest possible index (the dictionary may stop growing, so there's
+        no need to grow past it).
+        The indices are preceded by a byte holding the width of the largest possible index, and followed by zero bits
+        until the end of the last byte. Since every index takes at least 8 bits, the decompression algorithm knows these
+        bits are padding and not another index.
+        :return: A bytes object containing the indices in the object, bit-packed as described above. If there are no
+                 indices, an empty bytes object is returned.
         """
-        # For every index, extract only its necessary bytes (get rid of unnecessary 0 byts):
-        def get_important_bytes(n: int) -> bytes:
-            if n == 0:
-                return bytes(1)
-            important_bytes = []
-            while n > 0:
-                important_bytes.append(n & 0xFF)
-                n >>= 8
-            return bytes(important_bytes)  # Most significant byte last (little endian)
-        necessary_indices_bytes = map(get_important_bytes, self.indices)
-
-        # Add an extra byte for length:
-        padded_indices = map(lambda index_bytes: bytes([len(index_bytes)]) + index_bytes, necessary_indices_bytes)
-
-        # Concatenate it all:
-        return b''.join(padded_indices)
+        return bytes(self.__packed_indices)
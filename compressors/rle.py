@@ -1,5 +1,7 @@
+from operator import mul
+from itertools import islice
 from compressors import Compressor
-from util.bitbuffer import BitBuffer
+from util import SINGLE_BYTES
 
 
 class RleCompressor(Compressor):
@@ -16,15 +18,18 @@ class RleCompressor(Compressor):
         if len(input_data) == 0:
             return bytes()
 
-        # Initialize the buffer:
-        buffer: BitBuffer = BitBuffer()
+        # Every value takes a whole byte, so the runs are written straight into the output (without a bit buffer):
+        output: bytearray = bytearray()
         current_byte, repetitions = input_data[0], 1
 
-        for byte_val in input_data[1:]:
+        for byte_val in islice(input_data, 1, None):
             if current_byte != byte_val:
-                # Insert the byte value and the repetitions count:
-                buffer.insert_bits(current_byte, 8)
-                buffer.insert_bits(repetitions, 8)
+                # Insert the byte value and the repetitions count (longer runs are rare, so they're handled separately):
+                if repetitions <= 255:
+                    output.append(current_byte)
+                    output.append(repetitions)
+                else:
+                    RleCompressor.__write_run(output, current_byte, repetitions)
 
                 # Initialize byte and repetitions:
                 current_byte, repetitions = byte_val, 1
@@ -32,10 +37,24 @@ class RleCompressor(Compressor):
                 repetitions += 1
 
         # Add the current byte (it was skipped):
-        buffer.insert_bits(current_byte, 8)
-        buffer.insert_bits(repetitions, 8)
+        RleCompressor.__write_run(output, current_byte, repetitions)
 
-        return bytes(buffer)
+        return bytes(output)
+
+    @staticmethod
+    def __write_run(output: bytearray, byte_val: int, repetitions: int) -> None:
+        """
+        Writes a run of a byte value to the end of the output. The repetitions count is saved in a single byte, so a run
+        longer than 255 bytes is split into runs of 255 bytes, followed by a shorter run for the rest of the bytes.
+        :param output: The compressed data, which the run will be appended to.
+        :param byte_val: The value of the repeated byte.
+        :param repetitions: The amount of times the byte is repeated (must be positive).
+        """
+        full_runs, remaining_repetitions = divmod(repetitions, 255)
+        output += bytes((byte_val, 255)) * full_runs
+        if remaining_repetitions > 0:
+            output.append(byte_val)
+            output.append(remaining_repetitions)
 
     def decode(self, compressed_data: bytes) -> bytes:
         """
@@ -50,13 +69,7 @@ class RleCompressor(Compressor):
         if len(compressed_data) % 2 == 1:
             raise ValueError('Invalid data to be decoded by the RLE algorithm')
 
-        # Initialize the buffer:
-        buffer: BitBuffer = BitBuffer()
-
-        # Decode the data:
-        for i in range(0, len(compressed_data), 2):
-            byte_val, repetitions = compressed_data[i], compressed_data[i + 1]
-            for _ in range(repetitions):
-                buffer.insert_bits(byte_val, 8)
-
-        return bytes(buffer)
+        # Decode the data (every run is its byte repeated, and the runs are joined together), without going through
+        # the runs one by one in Python:
+        byte_values, repetitions = compressed_data[0::2], compressed_data[1::2]
+        return bytes().join(map(mul, map(SINGLE_BYTES.__getitem__, byte_values), repetitions))
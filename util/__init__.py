@@ -1,3 +1,8 @@
+# Every possible single byte as a bytes object, indexed by its value (avoids allocating a new one-byte object whenever
+# a byte value needs to be turned into bytes):
+SINGLE_BYTES: tuple[bytes, ...] = tuple(bytes([byte_val]) for byte_val in range(256))
+
+
 def get_bit(b: bytes, offset: int) -> int:
     """
     Extracts a single bit from the bytes object.
@@ -1,3 +1,4 @@
+import struct
 from collections import deque
 
 # In order to enforce the assumption that all integers have 32 bits, 'and' every left-shift result with this mask to
@@ -86,38 +87,10 @@ class BitBuffer:
         object is preserved.
         :return: A bytes object containing the bits in the object.
         """
-        # Calculate the amount of bytes needed beforehand:
-        saved_ints_bytes_count = 4 * len(self.__saved_data)
-        current_int_bytes_count = (self.__bit_idx + 7) // 8
-        bytes_needed = saved_ints_bytes_count + current_int_bytes_count
-
-        # Create a bytearray with this size:
-        stored_bits = bytearray(bytes_needed)
-
-        # Insert the saved integers first (their bits are already ordered according to user insertions):
-        for int_idx, saved_int in enumerate(self.__saved_data):
-            # An integer has 4 bytes:
-            for i in range(4):
-                stored_bits[int_idx * 4 + i] = BitBuffer.__get_byte_from_int(saved_int, i)
-
-        # Add the current int as well:
-        for i in range(current_int_bytes_count):
-            stored_bits[saved_ints_bytes_count + i] = BitBuffer.__get_byte_from_int(self.__current_int, i)
-
-        return bytes(stored_bits)
+        # The saved integers are full, so they are packed together as big-endian 32 bits words (their bits are already
+        # ordered according to user insertions):
+        saved_ints_bytes = struct.pack(f'>{len(self.__saved_data)}I', *self.__saved_data)
 
-    @staticmethod
-    def __get_byte_from_int(integer: int, byte_idx: int) -> int:
-        """
-        An integer is made of four bytes. This method returns a single byte out of those four, based on its index.
-        :param integer: The integer that the resulting byte will be extracted from.
-        :param byte_idx: The index of the byte inside the integer. This value must be in the range [0, 4), where index 0
-                         is referring to the most significant byte of the integer (i.e: the Xs part:
-                         XXXXXXXX -------- -------- --------).
-        :return: The byte at the specified index inside the integer.
-        :raises ValueError: If byte_idx is not in the range [0, 4).
-        """
-        if byte_idx < 0 or byte_idx > 3:
-            raise ValueError(f"Byte index must be in the range [0, 4) (got {byte_idx})")
-
-        return integer >> (8 * (3 - byte_idx)) & 0xFF
+        # Add only the bytes of the current int that were written to:
+        current_int_bytes_count = (self.__bit_idx + 7) // 8
+        return saved_ints_bytes + self.__current_int.to_bytes(4, 'big')[:current_int_bytes_count]